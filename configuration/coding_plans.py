@@ -1,3 +1,5 @@
+from functools import lru_cache, partial
+
 from core_data_modules.cleaners import somali, swahili, Codes
 from core_data_modules.traced_data.util.fold_traced_data import FoldStrategies
 
@@ -6,9 +8,12 @@ from configuration.code_schemes import CodeSchemes
 from src.lib.configuration_objects import CodingConfiguration, CodingModes, CodingPlan
 
 
+@lru_cache(maxsize=8192)
 def clean_age_with_range_filter(text):
     """
     Cleans age from the given `text`, setting to NC if the cleaned age is not in the range 10 <= age < 100.
+
+    Results are cached, because raw demographic responses are highly repetitive.
     """
     age = swahili.DemographicCleaner.clean_age(text)
     if type(age) == int and 10 <= age < 100:
@@ -19,6 +24,7 @@ def clean_age_with_range_filter(text):
         return Codes.NOT_CODED
 
 
+@lru_cache(maxsize=8192)
 def clean_district_if_no_mogadishu_sub_district(text):
     mogadishu_sub_district = somali.DemographicCleaner.clean_mogadishu_sub_district(text)
     if mogadishu_sub_district == Codes.NOT_CODED:
@@ -40,12 +46,15 @@ def make_rqa_coding_plan(episode_name, code_scheme, ws_match_value, coda_filenam
                                 code_scheme=code_scheme,
                                 coded_field=f"{episode_name}_coded",
                                 analysis_file_key=f"{episode_name}",
-                                fold_strategy=lambda x, y: FoldStrategies.list_of_labels(code_scheme, x, y)
+                                fold_strategy=partial(FoldStrategies.list_of_labels, code_scheme)
                           )],
                       ws_code=CodeSchemes.WS_CORRECT_DATASET_SCHEME.get_code_with_match_value(ws_match_value),
                       raw_field_fold_strategy=FoldStrategies.concatenate)
 
 
+# The get_*_coding_plans functions below are cached, so each pipeline's plans are only constructed once per process.
+# The returned lists and plans are shared between callers, so must be treated as read-only.
+@lru_cache(maxsize=None)
 def get_rqa_coding_plans(pipeline_name):
     if pipeline_name == "SSF-DCF":
         return [make_rqa_coding_plan(episode_name="rqa_dcf_s01e01", code_scheme=CodeSchemes.S01E01,
@@ -80,6 +89,7 @@ def get_rqa_coding_plans(pipeline_name):
                                      ws_match_value="ssf sld s01 closeout", coda_filename="SSF_SLD_s01_closeout")]
 
 
+@lru_cache(maxsize=None)
 def get_demog_coding_plans(pipeline_name):
     return [
         CodingPlan(raw_field="gender_raw",
@@ -105,7 +115,7 @@ def get_demog_coding_plans(pipeline_name):
                        CodingConfiguration(
                            coding_mode=CodingModes.SINGLE,
                            code_scheme=CodeSchemes.AGE,
-                           cleaner=lambda text: clean_age_with_range_filter(text),
+                           cleaner=clean_age_with_range_filter,
                            coded_field="age_coded",
                            analysis_file_key="age",
                            fold_strategy=FoldStrategies.assert_label_ids_equal,
@@ -170,7 +180,7 @@ def get_demog_coding_plans(pipeline_name):
                        CodingConfiguration(
                            coding_mode=CodingModes.SINGLE,
                            code_scheme=CodeSchemes.SOMALIA_DISTRICT,
-                           cleaner=lambda text: clean_district_if_no_mogadishu_sub_district(text),
+                           cleaner=clean_district_if_no_mogadishu_sub_district,
                            fold_strategy=FoldStrategies.assert_label_ids_equal,
                            coded_field="district_coded",
                            analysis_file_key="district",
@@ -205,13 +215,16 @@ def get_demog_coding_plans(pipeline_name):
     ]
 
 
+@lru_cache(maxsize=None)
 def get_follow_up_coding_plans(pipeline_name):
     return []
 
 
+@lru_cache(maxsize=None)
 def get_engagement_coding_plans(pipeline_name):
     return []
 
 
+@lru_cache(maxsize=None)
 def get_ws_correct_dataset_scheme(pipeline_name):
     return CodeSchemes.WS_CORRECT_DATASET_SCHEME
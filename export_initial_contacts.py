@@ -2,8 +2,11 @@ import argparse
 import csv
 import json
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from operator import itemgetter
 
-from core_data_modules.cleaners import Codes
 from core_data_modules.cleaners.codes import SomaliaCodes
 from core_data_modules.logging import Logger
 from id_infrastructure.firestore_uuid_table import FirestoreUuidTable
@@ -13,7 +16,67 @@ from src.lib import PipelineConfiguration
 
 log = Logger(__name__)
 
-TARGET_LOCATIONS = {SomaliaCodes.GALMUDUG, SomaliaCodes.SOUTH_WEST_STATE}
+TARGET_LOCATIONS = frozenset(
+    sys.intern(location) for location in [SomaliaCodes.GALMUDUG, SomaliaCodes.SOUTH_WEST_STATE]
+)
+
+
+def _scan_file(path):
+    """
+    Searches a previous messages or individuals analysis csv for contacts from one of the TARGET_LOCATIONS.
+
+    :param path: Path to the csv file to search.
+    :type path: str
+    :return: Tuple of (number of rows in the file,
+                       dictionary of uid -> the first target location that uid was seen in, in the order the uids were
+                       found).
+    :rtype: (int, dict of str -> str)
+    """
+    # Search the data for contacts from one of the relevant locations. Rows are streamed from the reader rather
+    # than loaded into a list up-front, so that only the uuids of interest are held in memory.
+    file_uuid_locations = dict()
+    row_count = 0
+    with open(path, mode="r") as csv_file:
+        # Read with a plain csv.reader and index the two columns we need, rather than building a dict per row
+        # with csv.DictReader. Blank lines are dropped, as csv.DictReader does.
+        csv_reader = filter(None, csv.reader(csv_file))
+        header = next(csv_reader, None)
+        if header is None:
+            return 0, file_uuid_locations
+        state_idx = header.index("state")
+        uid_idx = header.index("uid") if "uid" in header else None
+
+        if uid_idx is None:
+            # Files without a uid column have no contacts we can re-identify, so just count the rows.
+            row_count = sum(1 for _ in csv_reader)
+        else:
+            # Project each row down to its (state, uid) cells in C via itemgetter, so the Python loop body only
+            # deals with the two values it filters on. Names used in the loop are bound to locals up-front to
+            # avoid repeated global/attribute lookups.
+            min_row_length = max(state_idx, uid_idx) + 1
+            project = itemgetter(state_idx, uid_idx)
+            target_locations = TARGET_LOCATIONS
+            intern = sys.intern
+            set_file_uuid_location = file_uuid_locations.setdefault
+            for row in csv_reader:
+                row_count += 1
+                # Short rows don't have a value for every column, so can't contain a contact.
+                if len(row) < min_row_length:
+                    continue
+
+                location, uid = project(row)
+                # Codes.STOP isn't a target location, so STOP rows are rejected here too.
+                if location not in target_locations:
+                    continue
+
+                # Intern the locations we keep, so every contact shares one string object per location rather than
+                # retaining its own copy of the cell.
+                location = intern(location)
+
+                # setdefault keeps the location each uid was first seen in.
+                set_file_uuid_location(uid, location)
+    return row_count, file_uuid_locations
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generates lists of phone numbers of previous IMAQAL respondents who  "
@@ -33,8 +96,6 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    sys.setrecursionlimit(100000)
-
     google_cloud_credentials_file_path = args.google_cloud_credentials_file_path
     pipeline_configuration_file_path = args.pipeline_configuration_file_path
     csv_input_file_path = args.csv_input_file_path
@@ -46,11 +107,39 @@ if __name__ == "__main__":
     Logger.set_project_name(pipeline_configuration.pipeline_name)
     log.debug(f"Pipeline name is {pipeline_configuration.pipeline_name}")
 
+    # Scan the input files in parallel, then merge the results in input order so that each contact is attributed
+    # to the location it was first seen in, as if the files had been scanned one after the other.
+    # The pool is run before the Firestore UUID table is initialised, so that the workers aren't forked from a
+    # process holding gRPC client state. Per-file summaries are logged here rather than in the workers, so the
+    # log stays in input order.
+    uuids = set()
+    location_counts = Counter({location: 0 for location in TARGET_LOCATIONS})
+    log.info(f"Searching {len(csv_input_file_path)} previous csv files for participants from the target locations "
+             f"({TARGET_LOCATIONS})...")
+    with ProcessPoolExecutor() as executor:
+        for path, (row_count, file_uuid_locations) in zip(
+                csv_input_file_path, executor.map(_scan_file, csv_input_file_path)):
+            file_location_counts = Counter({location: 0 for location in TARGET_LOCATIONS})
+            file_location_counts.update(file_uuid_locations.values())
+            log.info(f"Loaded {row_count} rows from file '{path}'")
+            log.info(f"Found {len(file_uuid_locations)} contacts in the target locations "
+                     f"(per-location counts: {dict(file_location_counts)})")
+
+            # Merge each file's uids with bulk set operations rather than adding them one at a time.
+            new_uuids = file_uuid_locations.keys() - uuids
+            uuids.update(new_uuids)
+            location_counts.update(map(file_uuid_locations.__getitem__, new_uuids))
+            log.info(f"Running total: {len(uuids)} (per-location counts: {dict(location_counts)})")
+
     log.info("Downloading Firestore UUID Table credentials...")
-    firestore_uuid_table_credentials = json.loads(google_cloud_utils.download_blob_to_string(
+    firestore_uuid_table_credentials_file = BytesIO()
+    google_cloud_utils.download_blob_to_file(
         google_cloud_credentials_file_path,
-        pipeline_configuration.uuid_table.firebase_credentials_file_url
-    ))
+        pipeline_configuration.uuid_table.firebase_credentials_file_url,
+        firestore_uuid_table_credentials_file
+    )
+    firestore_uuid_table_credentials_file.seek(0)
+    firestore_uuid_table_credentials = json.load(firestore_uuid_table_credentials_file)
 
     phone_number_uuid_table = FirestoreUuidTable.init_from_credentials(
         firestore_uuid_table_credentials,
@@ -59,61 +148,20 @@ if __name__ == "__main__":
     )
     log.info("Initialised the Firestore UUID table")
 
-    uuids = set()
-    location_counts = {location: 0 for location in TARGET_LOCATIONS}
-    for path in csv_input_file_path:
-        # Load the data
-        log.info(f"Loading previous csv data from file '{path}'...")
-        with open(path, mode="r") as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            data = [row for row in csv_reader]
-        log.info(f"Loaded {len(data)} rows")
-
-        # Search the data for contacts from one of the relevant locations
-        log.info(f"Searching for participants from the target locations ({TARGET_LOCATIONS})...")
-        file_uuids = set()
-        file_location_counts = {location: 0 for location in TARGET_LOCATIONS}
-        for row in data:
-            if row["state"] == Codes.STOP:
-                continue
-
-            location = row["state"]
-            if location in TARGET_LOCATIONS:
-                if "uid" not in row:
-                    continue
-                if row["uid"] not in file_uuids:
-                    file_location_counts[location] += 1
-                    file_uuids.add(row["uid"])
-                if row["uid"] not in uuids:
-                    location_counts[location] += 1
-                    uuids.add(row["uid"])
-        
-        log.info(f"Found {len(file_uuids)} contacts in the target locations "
-                 f"(per-location counts: {file_location_counts})")
-        log.info(f"Running total: {len(uuids)} (per-location counts: {location_counts})")
-
     # Convert the uuids to phone numbers
     log.info(f"Converting {len(uuids)} uuids to phone numbers...")
     uuid_phone_number_lut = phone_number_uuid_table.uuid_to_data_batch(uuids)
-    phone_numbers = set()
-    skipped_uuids = set()
-    for uuid in uuids:
-        # Some uuids are no longer re-identifiable due to a uuid table consistency issue between OCHA and WorldBank-PLR
-        if uuid in uuid_phone_number_lut:
-            phone_numbers.add(f"+{uuid_phone_number_lut[uuid]}")
-        else:
-            skipped_uuids.add(uuid)
+    phone_numbers = {f"+{phone_number}" for phone_number in map(uuid_phone_number_lut.get, uuids)
+                     if phone_number is not None}
+    # Some uuids are no longer re-identifiable due to a uuid table consistency issue between OCHA and WorldBank-PLR
+    skipped_uuids = uuids - uuid_phone_number_lut.keys()
     log.info(f"Successfully converted {len(phone_numbers)} uuids to phone numbers.")
     log.warning(f"Unable to re-identify {len(skipped_uuids)} uuids")
 
     # Export contacts CSV
     log.warning(f"Exporting {len(phone_numbers)} phone numbers to {csv_output_file_path}...")
-    with open(csv_output_file_path, "w") as f:
-        writer = csv.DictWriter(f, fieldnames=["URN:Tel", "Name"], lineterminator="\n")
-        writer.writeheader()
-
-        for n in phone_numbers:
-            writer.writerow({
-                "URN:Tel": n
-            })
+    with open(csv_output_file_path, "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["URN:Tel", "Name"])
+        writer.writerows((n, "") for n in phone_numbers)
         log.info(f"Wrote {len(phone_numbers)} contacts to {csv_output_file_path}")
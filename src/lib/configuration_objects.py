@@ -7,6 +7,10 @@ class CodingModes(object):
 
 
 class CodingConfiguration(object):
+    __slots__ = ("coding_mode", "code_scheme", "coded_field", "raw_field", "requires_manual_verification",
+                 "analysis_file_key", "fold_strategy", "cleaner", "include_in_theme_distribution",
+                 "include_in_individuals_file")
+
     def __init__(self, coding_mode, code_scheme, coded_field, fold_strategy, raw_field=None,
                  requires_manual_verification=True, analysis_file_key=None, cleaner=None,
                  include_in_theme_distribution=True, include_in_individuals_file=True):
@@ -26,6 +30,10 @@ class CodingConfiguration(object):
 
 # TODO: Rename CodingPlan to something like DatasetConfiguration?
 class CodingPlan(object):
+    __slots__ = ("dataset_name", "raw_field", "time_field", "run_id_field", "coda_filename", "icr_filename",
+                 "coding_configurations", "code_imputation_function", "ws_code", "raw_field_fold_strategy",
+                 "message_id_fn", "id_field")
+
     def __init__(self, raw_field, coding_configurations, raw_field_fold_strategy, dataset_name=None, coda_filename=None,
                  ws_code=None, time_field=None, run_id_field=None, icr_filename=None, id_field=None,
                  code_imputation_function=None, message_id_fn=None):